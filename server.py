@@ -1,50 +1,297 @@
 import os  # System interface for environment variables
+import sys  # Platform detection for the optional uvloop event loop
+import atexit  # Shutdown hook to close pooled HTTP connections
+import socket  # TCP_NODELAY constants for transport tuning
+import io  # Wraps buffered response bytes for incremental parsing
 import httpx  # Async HTTP client for API requests
+import orjson  # C-accelerated JSON parsing for GitHub responses
+import ijson  # Incremental JSON parsing for megabyte-scale SBOMs
 import asyncio  # Asynchronous I/O and time management
+import re  # Precompiled token-format validation
+import time  # Timestamp component of generated branch names
+import secrets  # Random suffix so concurrent branch creates can't collide
+import random  # Jitter on rate-limit backoff sleeps
 import base64  # Encoding/decoding for GitHub file content
+import binascii  # base64's error type, for targeted decode handling
+import hashlib  # Token hashing for cache keys (avoids retaining plaintext)
+import functools  # Bounded memoization of per-token header dicts
+from collections import OrderedDict  # Bounded LRU for response caches
+from urllib.parse import quote  # Percent-encode user-supplied URL pieces
+from itertools import islice  # Early-exit slicing of large tree listings
+from dataclasses import dataclass  # Immutable config snapshot
+# typing_extensions (shipped with pydantic/fastmcp) rather than typing:
+# pydantic rejects typing.TypedDict on Python < 3.12 at tool registration
+from typing_extensions import TypedDict  # Structured tool results (machine-readable)
 from fastmcp import FastMCP, Context  # Core MCP server framework
 from fastmcp.exceptions import ToolError  # MCP specific error handling
-from dotenv import load_dotenv  # Load environment variables from .env file
-
-load_dotenv()  # Initialize environment variables
+# Containerized/production deployments inject env vars directly; skip the
+# .env file stat + parse there and only pay it in local development.
+if os.getenv("ENV", "dev") == "dev":
+    from dotenv import load_dotenv  # Load environment variables from .env file
+    load_dotenv()  # Initialize environment variables
 
 # --- Configuration ---
-# We use the Client ID to identify the app to GitHub.
-GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID")
-MCP_SERVER_NAME = "Smart Coding MCP"
+# Environment is read exactly once at import into an immutable snapshot;
+# runtime code never touches os.environ again.
+@dataclass(frozen=True, slots=True)
+class Config:
+    # We use the Client ID to identify the app to GitHub.
+    github_client_id: str | None
+    # Fallback token for deployments that inject it via environment
+    personal_access_token: str | None
+    server_name: str = "Smart Coding MCP"
+
+CFG = Config(
+    github_client_id=os.getenv("GITHUB_CLIENT_ID"),
+    personal_access_token=os.getenv("GITHUB_PERSONAL_ACCESS_TOKEN"),
+)
 
 # Initialize server instance
-mcp = FastMCP(MCP_SERVER_NAME)  
+mcp = FastMCP(CFG.server_name)
+
+# --- Shared HTTP Clients ---
+# One long-lived client per GitHub host, constructed once at import time.
+# Reusing the pool keeps TCP sockets and TLS sessions alive across tool
+# calls (and across device-flow polling iterations), avoiding a fresh
+# ~150ms handshake on every request.
+_HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=100,
+    keepalive_expiry=60.0,  # Keep sockets warm across asyncio tasks
+)
+_HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+def _make_transport() -> httpx.AsyncHTTPTransport:
+    """
+    Builds the pooled transport shared config: retries=2 re-attempts failed
+    *connects* at the socket layer (never 4xx/5xx responses), so a blip in
+    DNS/TCP setup doesn't surface as a tool error the LLM has to retry.
+    TCP_NODELAY sends the small JSON request bodies immediately instead of
+    letting Nagle's algorithm coalesce them (~40ms saved on some paths).
+    """
+    return httpx.AsyncHTTPTransport(
+        retries=2,
+        http2=True,
+        limits=_HTTP_LIMITS,
+        socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)],
+    )
+
+# OAuth / device-flow endpoints live on github.com
+# http2=True negotiates HTTP/2 via ALPN: the device-flow polling POSTs and
+# any concurrent tool fan-outs multiplex over one TLS connection with
+# HPACK-compressed headers instead of serializing on HTTP/1.1.
+GITHUB_CLIENT = httpx.AsyncClient(
+    base_url="https://github.com",
+    transport=_make_transport(),
+    timeout=_HTTP_TIMEOUT,
+)
+
+# REST API endpoints live on api.github.com.
+# Static headers are set once here (and HPACK-compressed under HTTP/2);
+# per-call headers only need to carry Authorization.
+GITHUB_API_CLIENT = httpx.AsyncClient(
+    base_url="https://api.github.com",
+    transport=_make_transport(),
+    headers={
+        "Accept": "application/vnd.github+json",
+        "Accept-Encoding": "gzip, br",  # Brotli shaves ~15-20% off gzip on JSON
+        "User-Agent": "smart-coding-mcp/1.0",
+        "X-GitHub-Api-Version": "2022-11-28",
+    },
+    timeout=_HTTP_TIMEOUT,
+)
+
+def _close_http_clients() -> None:
+    """
+    Closes the pooled clients when the process exits.
+    """
+    async def _aclose():
+        await GITHUB_CLIENT.aclose()
+        await GITHUB_API_CLIENT.aclose()
+
+    try:
+        asyncio.run(_aclose())
+    except RuntimeError:
+        pass  # Event loop already gone during interpreter shutdown
+
+atexit.register(_close_http_clients)
+
+# --- Connection Warmup ---
+# The first HTTPS call of a session pays DNS + TCP + TLS (~200-400ms) on the
+# user's critical path. Warming both pools as soon as any tool runs lets that
+# setup overlap the first request instead of serializing in front of later ones.
+_POOLS_WARMED = False
+_WARMUP_TASK = None  # Strong ref so the warmup task isn't garbage-collected
+
+async def _warm_github_pools() -> None:
+    """
+    Pre-resolves DNS and completes TLS handshakes to both GitHub hosts.
+    """
+    await asyncio.gather(
+        GITHUB_API_CLIENT.get("/zen"),  # Cheapest API endpoint
+        GITHUB_CLIENT.head("/"),
+        return_exceptions=True,  # Warmup is best-effort; never surface errors
+    )
+
+def _kick_pool_warmup() -> None:
+    """
+    Fires the one-shot warmup task in the background if not already done.
+    """
+    global _POOLS_WARMED, _WARMUP_TASK
+    if _POOLS_WARMED:
+        return
+    _POOLS_WARMED = True
+    _WARMUP_TASK = asyncio.create_task(_warm_github_pools())
+
+# Cap on concurrent GitHub API requests. Batch fan-outs overlap their
+# round-trips but stay below GitHub's secondary-rate-limit (abuse
+# detection) threshold. All API traffic goes through _gh_request below
+# (directly, or via _cached_get), which holds this while sending.
+_GH_SEMAPHORE = asyncio.Semaphore(10)
+
+def _throttle_delay(resp: httpx.Response) -> float | None:
+    """
+    Extracts the advertised wait from a throttled response, or None when
+    the 403 is a real permission error rather than rate limiting.
+    """
+    retry_after = resp.headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+    if resp.headers.get("x-ratelimit-remaining") == "0":
+        reset = resp.headers.get("x-ratelimit-reset")
+        if reset:
+            try:
+                return max(0.0, int(reset) - time.time())
+            except ValueError:
+                return None
+    return None
+
+async def _gh_request(method: str, path: str, **kwargs) -> httpx.Response:
+    """
+    Sends a request on the shared API client with bounded retry on
+    throttling and gateway errors.
+
+    403/429 responses carrying Retry-After or an exhausted rate-limit
+    window are retried after sleeping out the advertised delay (capped at
+    60s, plus jitter so synchronized clients don't stampede the reset);
+    502/503/504 get a short exponential backoff. At most 3 attempts; the
+    final response is returned either way for normal error parsing.
+    """
+    for attempt in range(3):
+        async with _GH_SEMAPHORE:
+            resp = await GITHUB_API_CLIENT.request(method, path, **kwargs)
+
+        if resp.status_code in (403, 429):
+            delay = _throttle_delay(resp)
+            if delay is None:
+                return resp  # Permission denial, not throttling
+        elif resp.status_code in (502, 503, 504):
+            delay = 0.5 * 2 ** attempt
+        else:
+            return resp
+
+        if attempt == 2:
+            break  # Out of attempts; surface the throttled response
+        await asyncio.sleep(min(delay, 60.0) + random.random() * 0.5)
+    return resp
 
 # --- Helper: Token Validation ---
+# Header name hoisted to a constant so the hot path doesn't rebuild the str
+_TOKEN_HEADER = "user-access-token"
+
+# Allow 'gho' (OAuth), 'ghp' (Personal), 'ghu' (User), and 'ghs' (App
+# installation) prefixes. The precompiled pattern also validates character
+# set and length, so truncated or garbage tokens are rejected locally
+# instead of costing a round-trip to GitHub just to learn they are bad.
+_TOKEN_RE = re.compile(r"\Agh[uops]_[A-Za-z0-9]{36,251}\Z")
+
+# Positive validations cached by blake2b digest (SIMD-accelerated in
+# OpenSSL, faster than sha256 for 40-byte inputs) so the cache never holds
+# plaintext tokens. Invalid tokens are re-checked each time.
+_VALIDATED_TOKENS: "OrderedDict[bytes, None]" = OrderedDict()
+_VALIDATED_TOKENS_MAX = 256
+
+def _is_valid_token_format(token: str) -> bool:
+    """
+    Pure format check; repeat calls with the same token hit a digest-keyed
+    LRU and skip the regex match entirely.
+    """
+    digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    if digest in _VALIDATED_TOKENS:
+        _VALIDATED_TOKENS.move_to_end(digest)
+        return True
+    if _TOKEN_RE.match(token) is None:
+        return False
+    _VALIDATED_TOKENS[digest] = None
+    if len(_VALIDATED_TOKENS) > _VALIDATED_TOKENS_MAX:
+        _VALIDATED_TOKENS.popitem(last=False)  # Evict least recently used
+    return True
+
 def validate_header_token(ctx: Context) -> str:
     """
     Extracts the token from the custom header 'User-Access-Token'.
+
+    The validated token is memoized on request.state so repeated calls
+    within the same request skip the header walk and prefix checks.
     """
-    try:
-        request = ctx.request_context.request  # Access raw request object
-        headers = request.headers  # Get headers dictionary
-        
-        # Check for the custom header (case-insensitive)
-        token = headers.get("user-access-token", "")
-        
-        if not token:
-            raise ValueError("Missing 'User-Access-Token' header.")
-            
-        # Allow 'gho' (OAuth), 'ghp' (Personal), and 'ghu' (User) prefixes
-        # This ensures we don't pass malformed strings to the GitHub API
-        if not token.startswith(("ghu", "gho", "ghp")):
-             raise ValueError("Invalid Token Format (must start with 'ghu', 'gho', or 'ghp')")
-             
-        return token
-        
-    except Exception:
+    _kick_pool_warmup()  # Overlap connection setup with the first tool call
+
+    # Explicit control flow, no try/except: raising ToolError directly from
+    # the checks skips building and chaining an inner exception + traceback
+    # on what is a perfectly ordinary "not logged in yet" path.
+    request = getattr(getattr(ctx, "request_context", None), "request", None)
+
+    if request is not None:
+        # Fast path: already validated earlier in this request
+        cached = getattr(request.state, "github_token", None)
+        if cached is not None:
+            return cached
+
+        # Check for the custom header (case-insensitive), falling back to
+        # the token configured via environment for header-less deployments
+        token = request.headers.get(_TOKEN_HEADER, "") or CFG.personal_access_token
+    else:
+        token = CFG.personal_access_token
+
+    # This ensures we don't pass malformed strings to the GitHub API
+    if not token or not _is_valid_token_format(token):
         raise ToolError(
             "Authentication Failed.\n"
             "The tool attempted to access GitHub but no valid token was found header.\n"
             "Please RUN the 'initiate_login' tool now to fix this."
         )
 
+    if request is not None:
+        request.state.github_token = token  # Memoize for this request
+    return token
+
+# --- Helper: Auth Headers ---
+@functools.lru_cache(maxsize=128)
+def _bearer_headers(token: str) -> dict:
+    """
+    Builds the Authorization header dict once per token; repeat tool calls
+    share the same dict instead of re-running the f-string + allocation.
+    Static headers (Accept, User-Agent, ...) already live on the client.
+    """
+    return {"Authorization": f"Bearer {token}"}
+
+@functools.lru_cache(maxsize=128)
+def _bearer_json_headers(token: str) -> dict:
+    """
+    Authorization plus Content-Type, for requests whose bodies are
+    serialized with orjson.dumps rather than httpx's stdlib json= path.
+    """
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+def _auth_headers(ctx: Context) -> dict:
+    """
+    Validates the request token and returns its ready-made header dict.
+    """
+    return _bearer_headers(validate_header_token(ctx))
+
 # --- Helper: Centralized Error Parsing ---
 def parse_github_error(resp: httpx.Response) -> str:
     """
@@ -52,9 +299,9 @@ def parse_github_error(resp: httpx.Response) -> str:
     """
     if resp.status_code == 401:
         return "401 Unauthorized: Your token is invalid, expired, or revoked."
-        
+
     if resp.status_code == 403:
-        # Common cause: The App is installed on the User's account, but NOT 
+        # Common cause: The App is installed on the User's account, but NOT
         # on the Organization that owns the repo.
         return (
             "403 Forbidden: Access denied. Possibilities:\n"
@@ -62,17 +309,17 @@ def parse_github_error(resp: httpx.Response) -> str:
             "2. Organization SAML/SSO enforcement is blocking access.\n"
             "3. API Rate limit exceeded."
         )
-        
+
     if resp.status_code == 404:
         # GitHub returns 404 for Private repos if you lack permissions
         return (
             "404 Not Found: The repository does not exist OR the App lacks permission to see it.\n"
             "(GitHub hides private repos as 404s to prevent leaking their existence)."
         )
-        
+
     if resp.status_code == 409:
         return "409 Conflict: The file has changed since you last read it (Git Conflict)."
-        
+
     if resp.status_code == 422:
         return "422 Unprocessable Entity: Validation failed (e.g., Pull Request already exists)."
 
@@ -83,43 +330,191 @@ def parse_github_error(resp: httpx.Response) -> str:
 # Tools 1 & 2: Handle the OAuth Device Flow to get a token.
 # ==============================================================================
 
+# Static device-flow payloads and headers, built once at import instead of
+# per call (and, for the poll body, per polling iteration).
+_JSON_ACCEPT = {"Accept": "application/json"}
+_DEVICE_CODE_BODY = {"client_id": CFG.github_client_id, "scope": "repo,read:org"}
+_POLL_BODY_BASE = {
+    "client_id": CFG.github_client_id,
+    "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
+}
+
 # --- Start Login (Non-Blocking) ---
 @mcp.tool()
 async def initiate_login() -> str:
     """
     Starts the GitHub login process.
-      
-    IMPORTANT: Do NOT call this tool unless any other tools have failed 
-    with an authentication error OR the user explicitly asks to login 
+
+    IMPORTANT: Do NOT call this tool unless any other tools have failed
+    with an authentication error OR the user explicitly asks to login
     to their GitHub account.
     """
-    async with httpx.AsyncClient() as client:
-        # Request device code from GitHub
-        # This initiates the OAuth Device Flow
-        resp = await client.post(
-            "https://github.com/login/device/code",
-            data={"client_id": GITHUB_CLIENT_ID, "scope": "repo,read:org"},
-            headers={"Accept": "application/json"}
-        )
-        data = resp.json()
-        
-        if resp.status_code != 200:
-            return f"Error connecting to GitHub: {resp.text}"
-
-        # Parse the response to get user verification codes
-        device_code = data["device_code"]
-        user_code = data["user_code"]
-        uri = data["verification_uri"]
-        interval = data.get("interval", 5)  # Polling interval recommended by GitHub
-
-        # Return instructions to the LLM to display to the user
-        return (
-            f"ACTION REQUIRED:\n"
-            f"1. Click this link: {uri}\n"
-            f"2. Enter this code: {user_code}\n\n"
-            "AFTER you have done this, please call the 'verify_login' tool "
-            f"with this device_code: {device_code}"
+    _kick_pool_warmup()  # Warm api.github.com too while we talk to github.com
+
+    # Request device code from GitHub
+    # This initiates the OAuth Device Flow
+    resp = await GITHUB_CLIENT.post(
+        "/login/device/code",
+        data=_DEVICE_CODE_BODY,
+        headers=_JSON_ACCEPT
+    )
+    try:
+        resp.raise_for_status()  # C-level 2xx fast path; no branch on success
+    except httpx.HTTPStatusError:
+        return f"Error connecting to GitHub: {resp.text}"
+
+    data = orjson.loads(resp.content)  # ~2-5x faster decode than stdlib json
+
+    # Parse the response to get user verification codes
+    device_code = data["device_code"]
+    user_code = data["user_code"]
+    uri = data["verification_uri"]
+    interval = data.get("interval", 5)  # Polling interval recommended by GitHub
+
+    # Remember GitHub's advised interval and code validity window so the
+    # poll runs at the pace (and for the duration) the server asked for
+    # rather than hardcoded defaults
+    _DEVICE_INTERVALS[device_code] = interval
+    _DEVICE_EXPIRES[device_code] = data.get("expires_in", 900)
+
+    # Start polling in the background immediately; by the time the user
+    # finishes authorizing in the browser, the token may already be parked
+    _PENDING_LOGINS[device_code] = asyncio.Event()
+    task = asyncio.create_task(_poll_and_store(device_code))
+    _LOGIN_TASKS.add(task)
+    task.add_done_callback(_LOGIN_TASKS.discard)
+
+    # Return instructions to the LLM to display to the user
+    return (
+        f"ACTION REQUIRED:\n"
+        f"1. Click this link: {uri}\n"
+        f"2. Enter this code: {user_code}\n\n"
+        "AFTER you have done this, please call the 'verify_login' tool "
+        f"with this device_code: {device_code}"
+    )
+
+# Success message built once at import; only the token is substituted per
+# login instead of re-assembling the whole multi-line blob in the handler.
+_LOGIN_SUCCESS_TEMPLATE = (
+    "SUCCESS! Token: {token}\n\n"
+    "CONFIGURATION STEP:\n"
+    "1. Copy this token.\n"
+    "2. Open your MCP Client config file.\n"
+    "3. Add the token to the 'env' section for 'smart-coding':\n"
+    '   "env": {{\n'
+    '     "GITHUB_PERSONAL_ACCESS_TOKEN": "{token}"\n'
+    '   }}\n'
+    "4. Restart Client."
+)
+
+# Server-advised polling intervals recorded by initiate_login, keyed by
+# device_code. verify_login may run in a different tool call, so the hint
+# has to survive between invocations.
+_DEVICE_INTERVALS: dict[str, int] = {}
+
+# Device-code validity windows (expires_in) from the same response. The
+# poll deadline follows GitHub's window, capped so one MCP tool call never
+# blocks for the full 15-minute default.
+_DEVICE_EXPIRES: dict[str, int] = {}
+_MAX_POLL_WINDOW = 300
+
+def _poll_deadline(device_code: str) -> int:
+    """
+    Seconds to keep polling for this device_code: GitHub's advertised
+    expiry when known, bounded by _MAX_POLL_WINDOW.
+    """
+    return min(_DEVICE_EXPIRES.get(device_code, 120), _MAX_POLL_WINDOW)
+
+# Single-flight map: concurrent verify_login calls with the same device_code
+# (common when the LLM retries) share one polling coroutine instead of
+# doubling the request rate against GitHub and risking 'slow_down'.
+_INFLIGHT_LOGINS: dict[str, asyncio.Future] = {}
+
+# Background login supervision: initiate_login spawns the poll as a task so
+# authorization progresses while the transport is free for other tools;
+# verify_login only waits on the completion event.
+_PENDING_LOGINS: dict[str, asyncio.Event] = {}
+_LOGIN_RESULTS: dict[str, str] = {}
+_LOGIN_TASKS: set = set()  # Strong refs so tasks aren't garbage-collected mid-poll
+
+# Device codes whose result has already been handed out. A repeat
+# verify_login for one of these gets a terminal message instead of
+# falling through to the poller and re-polling a consumed code for two
+# minutes. Bounded so long-lived processes don't accumulate codes.
+_CONSUMED_LOGINS: "OrderedDict[str, None]" = OrderedDict()
+_CONSUMED_LOGINS_MAX = 256
+
+def _mark_login_consumed(device_code: str) -> None:
+    _CONSUMED_LOGINS[device_code] = None
+    if len(_CONSUMED_LOGINS) > _CONSUMED_LOGINS_MAX:
+        _CONSUMED_LOGINS.popitem(last=False)  # Evict oldest
+
+async def _poll_and_store(device_code: str) -> None:
+    """
+    Runs the poll loop in the background and parks the outcome for
+    verify_login to collect.
+    """
+    try:
+        result = await asyncio.wait_for(
+            _poll_for_token(device_code), timeout=_poll_deadline(device_code)
         )
+    except asyncio.TimeoutError:
+        result = "Timeout: User did not authorize in time. Please try again."
+    except Exception as exc:
+        result = f"Login polling failed: {exc}"
+    finally:
+        _DEVICE_INTERVALS.pop(device_code, None)  # Hints are single-use
+        _DEVICE_EXPIRES.pop(device_code, None)
+    _LOGIN_RESULTS[device_code] = result
+    event = _PENDING_LOGINS.get(device_code)
+    if event is not None:
+        event.set()
+
+async def _poll_for_token(device_code: str) -> str:
+    """
+    Polls GitHub's access-token endpoint until authorized or expired.
+
+    The caller bounds this with asyncio.wait_for; no per-iteration
+    wall-clock checks are needed here.
+    """
+    # Start from GitHub's advised interval (RFC 8628); 5s is the documented
+    # default if this process never saw the initiate_login response.
+    interval = _DEVICE_INTERVALS.get(device_code, 5)
+    # Only device_code varies per login; build the whole request once and
+    # resend it each poll, skipping per-iteration URL parsing and header
+    # normalization inside httpx.
+    poll_request = GITHUB_CLIENT.build_request(
+        "POST",
+        "/login/oauth/access_token",
+        data={**_POLL_BODY_BASE, "device_code": device_code},
+        headers=_JSON_ACCEPT
+    )
+    while True:
+
+        # Check authorization status with GitHub. The per-request cap keeps
+        # one stalled POST from eating the whole authorization window.
+        poll_resp = await asyncio.wait_for(GITHUB_CLIENT.send(poll_request), timeout=10)
+        poll_data = orjson.loads(poll_resp.content)  # Hot path: runs every poll
+
+        # If the response contains 'access_token', the user has authorized
+        if "access_token" in poll_data:
+            return _LOGIN_SUCCESS_TEMPLATE.format(token=poll_data["access_token"])
+
+        # Handle explicit expiration error
+        error = poll_data.get("error")
+        if error == "expired_token":
+            return "The login code expired. Please start over with 'initiate_login'."
+
+        # The user clicked 'cancel' in the browser; no point polling on
+        if error == "access_denied":
+            return "Login was denied by the user. Start over with 'initiate_login' if this was a mistake."
+
+        # RFC 8628 backoff: 'slow_down' mandates adding 5s to the interval;
+        # 'authorization_pending' means keep polling at the current pace.
+        if error == "slow_down":
+            interval += 5
+
+        await asyncio.sleep(interval)  # Wait before next poll
 
 # --- Finish Login (Blocking) ---
 @mcp.tool()
@@ -130,51 +525,194 @@ async def verify_login(device_code: str) -> str:
     IMPORTANT: Tell the user where to put the personal access token when
     the login is successful.
     """
-    async with httpx.AsyncClient() as client:
-        # Use get_running_loop() and with timeout of 120s to prevent hanging
-        start_time = asyncio.get_running_loop().time()
-        while (asyncio.get_running_loop().time() - start_time) < 120:
-
-            # Check authorization status with GitHub
-            poll_resp = await client.post(
-                "https://github.com/login/oauth/access_token",
-                data={
-                    "client_id": GITHUB_CLIENT_ID,
-                    "device_code": device_code,
-                    "grant_type": "urn:ietf:params:oauth:grant-type:device_code"
-                },
-                headers={"Accept": "application/json"}
+    # Common case: initiate_login already has a background poll running for
+    # this device_code; just wait for its completion event.
+    event = _PENDING_LOGINS.get(device_code)
+    if event is not None:
+        try:
+            await asyncio.wait_for(event.wait(), timeout=_MAX_POLL_WINDOW)
+        except asyncio.TimeoutError:
+            return "Timeout: User did not authorize in time. Please try again."
+        _PENDING_LOGINS.pop(device_code, None)
+        _mark_login_consumed(device_code)
+        # Concurrent waiters (the LLM retrying) race to pop; losers get a
+        # terminal message instead of an unhandled KeyError
+        result = _LOGIN_RESULTS.pop(device_code, None)
+        if result is None:
+            return (
+                "This login result was already collected by a concurrent "
+                "'verify_login' call. If you still need the token, start over "
+                "with 'initiate_login'."
+            )
+        return result
+
+    # Late sequential call: the background poll finished and nobody
+    # collected the parked result yet
+    result = _LOGIN_RESULTS.pop(device_code, None)
+    if result is not None:
+        _mark_login_consumed(device_code)
+        return result
+
+    # Already handed out: re-polling a consumed code would just burn the
+    # full timeout before reporting a misleading failure
+    if device_code in _CONSUMED_LOGINS:
+        return (
+            "This device_code has already been used. Start over with "
+            "'initiate_login' if you need a new token."
+        )
+
+    # Fallback (initiate_login ran in another process): poll directly,
+    # deduplicating concurrent calls via the single-flight map.
+    existing = _INFLIGHT_LOGINS.get(device_code)
+    if existing is not None:
+        return await existing
+
+    future = asyncio.get_running_loop().create_future()
+    _INFLIGHT_LOGINS[device_code] = future
+    try:
+        # Single deadline handled by the event loop's timer heap instead of
+        # checking the wall clock on every poll iteration.
+        try:
+            result = await asyncio.wait_for(
+                _poll_for_token(device_code), timeout=_poll_deadline(device_code)
             )
-            poll_data = poll_resp.json()
-            
-            # If the response contains 'access_token', the user has authorized
-            if "access_token" in poll_data:
-                token = poll_data["access_token"]  
-                return (
-                    f"SUCCESS! Token: {token}\n\n"
-                    "CONFIGURATION STEP:\n"
-                    "1. Copy this token.\n"
-                    "2. Open your MCP Client config file.\n"
-                    "3. Add the token to the 'env' section for 'smart-coding':\n"
-                    f'   "env": {{\n'
-                    f'     "GITHUB_PERSONAL_ACCESS_TOKEN": "{token}"\n'
-                    f'   }}\n'
-                    "4. Restart Client."
-                )
-            
-            # Handle explicit expiration error
-            if poll_data.get("error") == "expired_token":
-                return "The login code expired. Please start over with 'initiate_login'."
-            
-            await asyncio.sleep(5)  # Wait 5 seconds before next poll
-            
-    return "Timeout: User did not authorize in time. Please try again."
+        except asyncio.TimeoutError:
+            result = "Timeout: User did not authorize in time. Please try again."
+        future.set_result(result)
+        _mark_login_consumed(device_code)  # Repeat calls get the terminal message
+        return result
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        _INFLIGHT_LOGINS.pop(device_code, None)
+        _DEVICE_INTERVALS.pop(device_code, None)  # Hints are single-use
+        _DEVICE_EXPIRES.pop(device_code, None)
 
 # ==============================================================================
 # PHASE 0: DISCOVERY
 # Use these tools to find out WHO the user is and search for repos.
 # ==============================================================================
 
+# --- Helper: Conditional-Request Cache (ETag + TTL) ---
+# GitHub returns an ETag on every GET; replaying it via If-None-Match makes
+# unchanged responses come back as a bodyless 304 that costs no rate-limit
+# point. Within the TTL the cached body is served with no network at all.
+# Keyed by (token digest, path, accept) so plaintext tokens are never
+# retained, tenants can never see each other's cached responses, and raw
+# vs JSON representations of the same path never collide.
+# Entries are (etag, response, expires_at-monotonic).
+_ETAG_CACHE: "OrderedDict[tuple[str, str, str], tuple[str, httpx.Response, float]]" = OrderedDict()
+_ETAG_CACHE_MAX = 512
+_ETAG_CACHE_TTL = 300.0
+
+# Per-key locks so concurrent misses on the same URL collapse into one
+# upstream fetch instead of a dogpile; pruned alongside cache eviction.
+_CACHE_LOCKS: dict[tuple, asyncio.Lock] = {}
+
+def _lock_for(key: tuple) -> asyncio.Lock:
+    lock = _CACHE_LOCKS.get(key)
+    if lock is None:
+        lock = _CACHE_LOCKS.setdefault(key, asyncio.Lock())
+    return lock
+
+# Raw media type: GitHub returns the file bytes directly instead of a JSON
+# envelope with a base64-inflated 'content' field.
+_RAW_ACCEPT = {"Accept": "application/vnd.github.raw"}
+
+def _token_cache_key(token: str) -> str:
+    """
+    Hashes a token for use as a cache key.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _cache_entry_fresh(key: tuple) -> httpx.Response | None:
+    """
+    Returns the cached response if it is still inside its TTL, else None.
+    """
+    entry = _ETAG_CACHE.get(key)
+    if entry is not None and time.monotonic() < entry[2]:
+        _ETAG_CACHE.move_to_end(key)
+        return entry[1]
+    return None
+
+def _cache_store(key: tuple, etag: str, resp: httpx.Response) -> None:
+    """
+    Stores/refreshes an entry with a fresh TTL, evicting the oldest (and
+    its lock) when over capacity.
+    """
+    _ETAG_CACHE[key] = (etag, resp, time.monotonic() + _ETAG_CACHE_TTL)
+    _ETAG_CACHE.move_to_end(key)
+    if len(_ETAG_CACHE) > _ETAG_CACHE_MAX:
+        evicted, _ = _ETAG_CACHE.popitem(last=False)  # Evict least recently used
+        _CACHE_LOCKS.pop(evicted, None)
+
+async def _cached_get(path: str, token: str, headers: dict | None = None) -> httpx.Response:
+    """
+    TTL + ETag aware GET over the shared API client, bounded by _GH_SEMAPHORE.
+
+    Within the TTL the cached response is returned with no network I/O.
+    After it expires, the stored ETag is replayed via If-None-Match; a 304
+    re-arms the TTL and hands back the cached 200, so callers stay
+    oblivious to whether the body came off the wire or the cache.
+    """
+    key = (_token_cache_key(token), path, (headers or {}).get("Accept", ""))
+    cached = _cache_entry_fresh(key)
+    if cached is not None:
+        return cached
+
+    # Dogpile guard: concurrent misses on this key queue behind one fetch
+    async with _lock_for(key):
+        cached = _cache_entry_fresh(key)  # Re-check; the winner may have filled it
+        if cached is not None:
+            return cached
+        entry = _ETAG_CACHE.get(key)
+
+        send_headers = {"Authorization": f"Bearer {token}"}
+        if headers:
+            send_headers.update(headers)
+        if entry is not None:
+            send_headers["If-None-Match"] = entry[0]
+
+        # _gh_request handles the semaphore plus rate-limit/5xx backoff
+        resp = await _gh_request("GET", path, headers=send_headers)
+
+        # Unchanged upstream: re-arm the TTL and hand back the cached body
+        if resp.status_code == 304 and entry is not None:
+            _cache_store(key, entry[0], entry[1])
+            return entry[1]
+
+        etag = resp.headers.get("ETag")
+        if resp.status_code == 200 and etag:
+            _cache_store(key, etag, resp)
+
+        return resp
+
+# --- Helper: Repo Formatting ---
+def _access_level(perms: dict) -> str:
+    """
+    Maps a GitHub permissions dict to the highest human-readable access level.
+    """
+    if perms.get("admin"):
+        return "Admin"
+    if perms.get("maintain"):
+        return "Maintain"
+    if perms.get("push"):
+        return "Write"
+    if perms.get("pull"):
+        return "Read-Only"
+    return "No-Access"
+
+def _format_repo_line(r: dict) -> str:
+    """
+    Formats one repo entry (scope, access level, description) for the LLM.
+    """
+    private_status = "[Private]" if r.get("private") else "[Public]"
+    return (
+        f"- {private_status} {r.get('full_name')} "
+        f"(Access: {_access_level(r.get('permissions', {}))}): {r.get('description', 'No description')}"
+    )
+
 @mcp.tool()
 async def list_recent_repos(ctx: Context) -> str:
     """
@@ -186,103 +724,74 @@ async def list_recent_repos(ctx: Context) -> str:
     If the desired repository is NOT in this list, use 'search_repositories'.
     """
     token = validate_header_token(ctx)
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
 
-    async with httpx.AsyncClient() as client:
-        # Fetch Repos (Top 10 recently updated, including Orgs)
-        repos_resp = await client.get(
-            "https://api.github.com/user/repos?sort=updated&per_page=10&type=all", 
-            headers=headers
-        )
+    # Fetch Repos (Top 10 recently updated, including Orgs); a repeat call
+    # with an unchanged list is served from the ETag cache at zero quota cost
+    repos_resp = await _cached_get("/user/repos?sort=updated&per_page=10&type=all", token)
 
-        repo_list = []
-        if repos_resp.status_code == 200:
-            repos = repos_resp.json()
-            for r in repos:
-                # 1. Determine Scope
-                private_status = "[Private]" if r.get("private") else "[Public]"
-                
-                # 2. Determine Permissions
-                perms = r.get("permissions", {})
-                if perms.get("admin"):
-                    access_level = "Admin"
-                elif perms.get("maintain"):
-                    access_level = "Maintain"
-                elif perms.get("push"):
-                    access_level = "Write"
-                elif perms.get("pull"):
-                    access_level = "Read-Only"
-                else:
-                    access_level = "No-Access"
-
-                # 3. Format Output
-                repo_list.append(
-                    f"- {private_status} {r.get('full_name')} "
-                    f"(Access: {access_level}): {r.get('description', 'No description')}"
-                )
-        else:
-            # Explicitly capture why listing repos failed
-            return f"Error fetching repositories: {parse_github_error(repos_resp)}"
+    try:
+        repos_resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        # Explicitly capture why listing repos failed
+        return f"Error fetching repositories: {parse_github_error(e.response)}"
 
-        return (
-            f"Top 10 Recent Repositories:\n"
-            f"===================================\n" + 
-            "\n".join(repo_list)
-        )
+    repos = orjson.loads(repos_resp.content)  # C parser; skips .json()'s stdlib path
+
+    # Join over a generator: no intermediate list of formatted lines
+    return (
+        f"Top 10 Recent Repositories:\n"
+        f"===================================\n" +
+        "\n".join(_format_repo_line(r) for r in repos)
+    )
 
 @mcp.tool()
 async def search_repositories(ctx: Context, query: str) -> str:
     """
     Step 0 (Part B): Searches for repositories accessible to the user.
     API Call: GET /search/repositories
-    
-    IMPORTANT: Use this tool if the repository the user wants to work on is 
-    NOT listed in the 'list_recent_repos' results. This allows you to find 
+
+    IMPORTANT: Use this tool if the repository the user wants to work on is
+    NOT listed in the 'list_recent_repos' results. This allows you to find
     older or less frequently used repositories.
     """
-    token = validate_header_token(ctx)
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
-
-    async with httpx.AsyncClient() as client:
-        # Search for repos matching the query that the user has access to
-        # 'user:@me' limits search to the authenticated user's scope
-        search_url = f"https://api.github.com/search/repositories?q={query}+user:@me&per_page=5"
-        
-        resp = await client.get(search_url, headers=headers)
-        
-        if resp.status_code != 200:
-            return f"Search failed: {parse_github_error(resp)}"
-            
-        data = resp.json()
-        items = data.get("items", [])
-        
-        if not items:
-            return f"No repositories found matching '{query}'."
-            
-        results = []
-        for repo in items:
-            private_status = "[Private]" if repo.get("private") else "[Public]"
-            
-            # Determine Permissions (Same logic as list_recent_repos)
-            perms = repo.get("permissions", {})
-            if perms.get("admin"):
-                access_level = "Admin"
-            elif perms.get("maintain"):
-                access_level = "Maintain"
-            elif perms.get("push"):
-                access_level = "Write"
-            elif perms.get("pull"):
-                access_level = "Read-Only"
-            else:
-                access_level = "No-Access"
-
-            # Include the updated date so the user knows if it's an old project
-            results.append(
-                f"- {private_status} {repo['full_name']} "
-                f"(Access: {access_level}) - Updated: {repo['updated_at'][:10]}"
-            )
-            
-        return f"Search Results for '{query}':\n" + "\n".join(results)
+    headers = _auth_headers(ctx)
+
+    # Search for repos matching the query that the user has access to.
+    # 'user:@me' limits search to the authenticated user's scope; the
+    # query is percent-encoded so spaces/#/& can't malform the URL and
+    # waste a round-trip on a 400.
+    search_url = f"/search/repositories?q={quote(f'{query} user:@me')}&per_page=5"
+
+    resp = await _gh_request("GET", search_url, headers=headers)
+
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        return f"Search failed: {parse_github_error(e.response)}"
+
+    data = orjson.loads(resp.content)
+    items = data.get("items", [])
+
+    if not items:
+        return f"No repositories found matching '{query}'."
+
+    # Include the updated date so the user knows if it's an old project.
+    # Access level shares the list_recent_repos helper; the join runs over
+    # a generator so no intermediate list is built.
+    return f"Search Results for '{query}':\n" + "\n".join(
+        f"- {'[Private]' if r.get('private') else '[Public]'} {r['full_name']} "
+        f"(Access: {_access_level(r.get('permissions', {}))}) - Updated: {r['updated_at'][:10]}"
+        for r in items
+    )
+
+# Endpoint path templates shared across tools, defined once instead of
+# re-spelled inline at each call site. Dynamic pieces are substituted via
+# .format with pre-quoted values.
+_TREE_URL = "/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
+_CONTENTS_URL = "/repos/{owner}/{repo}/contents/{path}"
+_LANGS_URL = "/repos/{owner}/{repo}/languages"
+_SBOM_URL = "/repos/{owner}/{repo}/dependency-graph/sbom"
+_README_URL = "/repos/{owner}/{repo}/readme"
 
 # ==============================================================================
 # PHASE 1: ORIENTATION (The Map)
@@ -296,34 +805,40 @@ async def get_repository_map(ctx: Context, owner: str, repo: str, branch: str =
     API Call: GET /git/trees/{branch}?recursive=1
 
     IMPORTANT: When the user asks to change a file of source code within
-    a project or github repository, get_repository_map represents the first 
-    tool in the cronilogical order of operations. You are required to call 
+    a project or github repository, get_repository_map represents the first
+    tool in the cronilogical order of operations. You are required to call
     all seven tools that have steps 1-7 to fully complete the task. See
     all tool docstrings for the step order. After completing these steps
     once, you can call tools as needed for adjustments to the file.
     """
     token = validate_header_token(ctx)
-    async with httpx.AsyncClient() as client:
-        # Recursive=1 fetches nested folders (Deep Context)
-        url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
-        resp = await client.get(
-            url, 
-            headers={"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
-        )
-        
-        # Explicit error handling for missing/unauthorized repos
-        if resp.status_code != 200:
-            return parse_github_error(resp)
-
-        data = resp.json()
-        if data.get("truncated"):
-            return "Warning: Repo is too large. Showing partial structure."
-        
-        # Filter to only show files (blobs), ignore folders to save tokens
-        files = [item["path"] for item in data.get("tree", []) if item["type"] == "blob"]
-        
-        # Return top 200 files to prevent context overflow in the LLM
-        return f"Repository Map for {owner}/{repo}:\n\n" + "\n".join(files[:200])
+    # Recursive=1 fetches nested folders (Deep Context)
+    url = _TREE_URL.format(owner=owner, repo=repo, branch=quote(branch, safe=""))
+    resp = await _cached_get(url, token)
+
+    # Explicit error handling for missing/unauthorized repos
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        return parse_github_error(e.response)
+
+    return _format_repo_map(orjson.loads(resp.content), owner, repo)
+
+def _format_repo_map(data: dict, owner: str, repo: str) -> str:
+    """
+    Renders a parsed recursive-tree response as the repository map.
+    """
+    if data.get("truncated"):
+        return "Warning: Repo is too large. Showing partial structure."
+
+    # Filter to only show files (blobs), ignore folders to save tokens.
+    # islice stops at the 200th blob, so a 50k-entry tree never gets
+    # materialized as a full list just to be sliced down afterwards.
+    tree = data.get("tree", ())
+    files = islice((item["path"] for item in tree if item["type"] == "blob"), 200)
+
+    # Return top 200 files to prevent context overflow in the LLM
+    return f"Repository Map for {owner}/{repo}:\n\n" + "\n".join(files)
 
 @mcp.tool()
 async def get_project_overview(ctx: Context, owner: str, repo: str) -> str:
@@ -332,120 +847,320 @@ async def get_project_overview(ctx: Context, owner: str, repo: str) -> str:
     API Calls: GET /languages, GET /dependency-graph/sbom, GET /readme
 
     IMPORTANT: When the user asks to change a file of source code within
-    a project or github repository, get_repository_map represents the first 
-    tool in the cronilogical order of operations. You are required to call 
+    a project or github repository, get_repository_map represents the first
+    tool in the cronilogical order of operations. You are required to call
     all seven tools that have steps 1-7 to fully complete the task. See
     all tool docstrings for the step order. After completing these steps
     once, you can call tools as needed for adjustments to the file.
     """
     token = validate_header_token(ctx)
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
-    
-    async with httpx.AsyncClient() as client:
-        # Run 3 inexpensive requests in parallel to reduce latency
-        tasks = [
-            client.get(f"https://api.github.com/repos/{owner}/{repo}/languages", headers=headers),
-            client.get(f"https://api.github.com/repos/{owner}/{repo}/dependency-graph/sbom", headers=headers),
-            client.get(f"https://api.github.com/repos/{owner}/{repo}/readme", headers=headers)
-        ]
-        
-        # Wait for all requests to complete
-        langs_resp, sbom_resp, readme_resp = await asyncio.gather(*tasks)
-        
-        # 1. Process Languages
-        languages = list(langs_resp.json().keys()) if langs_resp.status_code == 200 else ["Unknown"]
-        
-        # 2. Process SBOM (Software Bill of Materials / Libraries)
-        stack = []
-        if sbom_resp.status_code == 200:
-            data = sbom_resp.json()
-            for pkg in data.get("sbom", {}).get("packages", []):
+
+    # Run 3 inexpensive requests in parallel to reduce latency. The SBOM
+    # endpoint is by far the slowest (and 403/404s for most repos), so it
+    # gets its own capped wait: overview latency is bounded by the fast
+    # endpoints, not the dependency graph's worst case.
+    sbom_task = asyncio.create_task(
+        _cached_get(_SBOM_URL.format(owner=owner, repo=repo), token)
+    )
+    langs_resp, readme_resp = await asyncio.gather(
+        _cached_get(_LANGS_URL.format(owner=owner, repo=repo), token),
+        _cached_get(_README_URL.format(owner=owner, repo=repo), token)
+    )
+    try:
+        sbom_resp = await asyncio.wait_for(sbom_task, timeout=3.0)
+    except asyncio.TimeoutError:
+        sbom_resp = None  # Ship the overview without the tech stack
+
+    return _format_overview(langs_resp, sbom_resp, readme_resp, owner, repo)
+
+def _format_overview(
+    langs_resp: httpx.Response,
+    sbom_resp: httpx.Response | None,
+    readme_resp: httpx.Response,
+    owner: str,
+    repo: str,
+) -> str:
+    """
+    Renders the languages/SBOM/README responses as the project overview.
+    """
+    # 1. Process Languages
+    languages = list(orjson.loads(langs_resp.content).keys()) if langs_resp.status_code == 200 else ["Unknown"]
+
+    # 2. Process SBOM (Software Bill of Materials / Libraries).
+    # Only 10 packages are ever shown, so ijson walks the buffered bytes
+    # incrementally and stops after the 10th instead of materializing
+    # thousands of package dicts from a megabyte-scale SBOM.
+    stack = []
+    if sbom_resp is None:
+        stack = ["(SBOM unavailable)"]
+    elif sbom_resp.status_code == 200:
+        try:
+            packages = ijson.items(io.BytesIO(sbom_resp.content), "sbom.packages.item")
+            stack = [
+                f"{pkg.get('name')} ({pkg.get('versionInfo', '')})"
+                for pkg in islice(packages, 10)
+            ]
+        except ijson.JSONError:
+            data = orjson.loads(sbom_resp.content)  # Full parse as fallback
+            for pkg in data.get("sbom", {}).get("packages", [])[:10]:
                 stack.append(f"{pkg.get('name')} ({pkg.get('versionInfo', '')})")
-        else:
-            stack = ["(Dependency Graph disabled for this repo)"]
+    else:
+        stack = ["(Dependency Graph disabled for this repo)"]
 
-        # 3. Process README
-        readme_snippet = "No README found."
-        if readme_resp.status_code == 200:
-            try:
-                content = base64.b64decode(readme_resp.json()["content"]).decode("utf-8")
-                readme_snippet = content[:500] + "..." # Truncate to first 500 chars
-            except:
-                readme_snippet = "Error decoding README."
-        # If the README is missing (404), it's not a critical error, so we don't return parse_github_error here.
+    # 3. Process README
+    readme_snippet = "No README found."
+    if readme_resp.status_code == 200:
+        try:
+            content = base64.b64decode(orjson.loads(readme_resp.content)["content"]).decode("utf-8")
+            readme_snippet = content[:500] + "..." # Truncate to first 500 chars
+        except (KeyError, binascii.Error, UnicodeDecodeError):
+            readme_snippet = "Error decoding README."
+    # If the README is missing (404), it's not a critical error, so we don't return parse_github_error here.
 
-        return (
-            f"PROJECT OVERVIEW: {owner}/{repo}\n"
-            f"===================================\n"
-            f"Languages: {', '.join(languages)}\n"
-            f"Tech Stack: {', '.join(stack[:10])}\n"
-            f"README Preview:\n{readme_snippet}"
-        )
+    return (
+        f"PROJECT OVERVIEW: {owner}/{repo}\n"
+        f"===================================\n"
+        f"Languages: {', '.join(languages)}\n"
+        f"Tech Stack: {', '.join(stack[:10])}\n"
+        f"README Preview:\n{readme_snippet}"
+    )
+
+@mcp.tool()
+async def orient_repository(ctx: Context, owner: str, repo: str, branch: str = "main") -> str:
+    """
+    Steps 1+2 fused: retrieves the file structure AND the project overview
+    in a single call.
+    API Calls: GET /git/trees, GET /languages, GET /dependency-graph/sbom,
+    GET /readme (all in parallel)
+
+    IMPORTANT: Prefer this tool over calling 'get_repository_map' and
+    'get_project_overview' separately — it returns both results in one
+    round-trip. The individual tools remain available for refreshing just
+    one of the two views.
+    """
+    token = validate_header_token(ctx)
+
+    # All four endpoints are independent; fan them out in one gather so
+    # the whole orientation costs max(one slow call), not a sum. The SBOM
+    # keeps its own capped wait as in get_project_overview.
+    tree_url = _TREE_URL.format(owner=owner, repo=repo, branch=quote(branch, safe=""))
+    sbom_task = asyncio.create_task(
+        _cached_get(_SBOM_URL.format(owner=owner, repo=repo), token)
+    )
+    tree_resp, langs_resp, readme_resp = await asyncio.gather(
+        _cached_get(tree_url, token),
+        _cached_get(_LANGS_URL.format(owner=owner, repo=repo), token),
+        _cached_get(_README_URL.format(owner=owner, repo=repo), token)
+    )
+    try:
+        sbom_resp = await asyncio.wait_for(sbom_task, timeout=3.0)
+    except asyncio.TimeoutError:
+        sbom_resp = None
+
+    try:
+        tree_resp.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        return parse_github_error(e.response)
+
+    return (
+        _format_repo_map(orjson.loads(tree_resp.content), owner, repo)
+        + "\n\n"
+        + _format_overview(langs_resp, sbom_resp, readme_resp, owner, repo)
+    )
 
 # ==============================================================================
 # PHASE 2: INSPECTION (The Reader)
 # Use these tools to read code. 'Deep' for target files, 'References' for imports.
 # ==============================================================================
 
+# Built once at import: content, last-3 history, and the PR tied to the
+# newest commit, all in one GraphQL round-trip. The metadata variant
+# selects only the blob oid so a SHA-only lookup never transfers content.
+def _build_inspect_query(blob_fields: str) -> str:
+    return (
+        "query($o:String!,$r:String!,$exp:String!,$path:String!){"
+        "repository(owner:$o,name:$r){"
+        f"object(expression:$exp){{... on Blob{{{blob_fields}}}}}"
+        "defaultBranchRef{target{... on Commit{"
+        "history(first:3,path:$path){nodes{messageHeadline author{name}"
+        " associatedPullRequests(first:1){nodes{number title body}}}}}}}"
+        "}}"
+    )
+
+_INSPECT_QUERY = _build_inspect_query("text oid")
+_INSPECT_QUERY_META = _build_inspect_query("oid")
+
+async def _inspect_via_graphql(
+    owner: str, repo: str, path: str, token: str, include_content: bool
+) -> str:
+    """
+    Fetches content + history + associated PR in one /graphql POST and
+    renders the deep-inspection report.
+
+    Raises on transport/GraphQL errors or when the path is not a text
+    blob; the caller falls back to the REST flow, which reports why.
+    """
+    query = _INSPECT_QUERY if include_content else _INSPECT_QUERY_META
+    variables = {"o": owner, "r": repo, "exp": f"HEAD:{path}", "path": path}
+    resp = await _gh_request(
+        "POST",
+        "/graphql",
+        content=orjson.dumps({"query": query, "variables": variables}),
+        headers=_bearer_json_headers(token),
+    )
+    resp.raise_for_status()
+    payload = orjson.loads(resp.content)
+    if payload.get("errors"):
+        raise ValueError(payload["errors"][0].get("message", "GraphQL query failed"))
+
+    repo_data = payload["data"]["repository"]
+    blob = repo_data.get("object")
+    if not blob or (include_content and blob.get("text") is None):
+        raise ValueError("path is missing or not a text blob")
+
+    history_text = ""
+    pr_context = "No associated PR found."
+    ref = repo_data.get("defaultBranchRef") or {}
+    nodes = ref.get("target", {}).get("history", {}).get("nodes", [])
+    for i, c in enumerate(nodes):
+        history_text += f"- {c['author']['name']}: {c['messageHeadline']}\n"
+        if i == 0:
+            # PR intent comes from the LATEST change, same as the REST flow
+            prs = c.get("associatedPullRequests", {}).get("nodes", [])
+            if prs:
+                pr = prs[0]
+                pr_context = f"PR #{pr['number']} - {pr['title']}\n{(pr.get('body') or '')[:200]}..."
+
+    report = (
+        f"DEEP INSPECTION: {path}\n"
+        f"File SHA: {blob['oid']} (Required for updates)\n"
+        f"===================================\n"
+        f"Recent History:\n{history_text}\n"
+        f"Business Intent (PR):\n{pr_context}"
+    )
+    if include_content:
+        report += f"\n===================================\n{blob['text']}"
+    return report
+
 @mcp.tool()
-async def inspect_target_file(ctx: Context, owner: str, repo: str, path: str) -> str:
+async def inspect_target_file(
+    ctx: Context, owner: str, repo: str, path: str, include_content: bool = True
+) -> str:
     """
     Step 3: Deep analysis of the file you want to document.
     API Calls: GET /contents, GET /commits, GET /commits/{sha}/pulls
 
+    Set include_content=False when only the SHA and history are needed
+    (e.g., refreshing the SHA before an update); this skips transferring
+    and returning the file body.
+
     IMPORTANT: When the user asks to change a file of source code within
-    a project or github repository, get_repository_map represents the first 
-    tool in the cronilogical order of operations. You are required to call 
+    a project or github repository, get_repository_map represents the first
+    tool in the cronilogical order of operations. You are required to call
     all seven tools that have steps 1-7 to fully complete the task. See
     all tool docstrings for the step order. After completing these steps
     once, you can call tools as needed for adjustments to the file.
     """
     token = validate_header_token(ctx)
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
-    
-    async with httpx.AsyncClient() as client:
-        # A. Get Content
-        content_resp = await client.get(f"https://api.github.com/repos/{owner}/{repo}/contents/{path}", headers=headers)
-        
-        # Explicitly catch file not found or permission errors
-        if content_resp.status_code != 200:
-            return parse_github_error(content_resp)
-        
-        file_data = content_resp.json()
-        content = base64.b64decode(file_data["content"]).decode("utf-8")
-        current_sha = file_data["sha"] # SHA needed later for updates
-
-        # B. Get Commit History (Last 3)
-        history_resp = await client.get(f"https://api.github.com/repos/{owner}/{repo}/commits?path={path}&per_page=3", headers=headers)
-        commits = history_resp.json() if history_resp.status_code == 200 else []
-        
-        history_text = ""
-        latest_commit_sha = None
-        
-        for c in commits:
-            if not latest_commit_sha: latest_commit_sha = c["sha"]
-            msg = c["commit"]["message"].split('\n')[0]
-            author = c["commit"]["author"]["name"]
-            history_text += f"- {author}: {msg}\n"
-
-        # C. Get Intent (PR) associated with the LATEST change
-        pr_context = "No associated PR found."
-        if latest_commit_sha:
-            # Special endpoint to link commit -> PR to understand business logic
-            pr_resp = await client.get(f"https://api.github.com/repos/{owner}/{repo}/commits/{latest_commit_sha}/pulls", headers=headers)
-            if pr_resp.status_code == 200 and pr_resp.json():
-                pr = pr_resp.json()[0]
+
+    # Fast path: one GraphQL POST carries content, history, and PR intent
+    # together, collapsing the 3-call REST sequence into a single round-trip
+    try:
+        return await _inspect_via_graphql(owner, repo, path, token, include_content)
+    except Exception:
+        pass  # GraphQL unavailable or binary/missing blob; REST explains
+
+    # A + B. Content and commit history are independent; fetch them
+    # concurrently so the tool pays one round-trip instead of two. The raw
+    # media type skips the base64 JSON envelope on the content fetch.
+    contents_path = _CONTENTS_URL.format(owner=owner, repo=repo, path=quote(path, safe="/"))
+    content_resp, history_resp = await asyncio.gather(
+        _cached_get(contents_path, token, headers=_RAW_ACCEPT),
+        _cached_get(f"/repos/{owner}/{repo}/commits?path={quote(path, safe='')}&per_page=3", token)
+    )
+
+    # Explicitly catch file not found or permission errors
+    if content_resp.status_code != 200:
+        return parse_github_error(content_resp)
+
+    content = content_resp.text
+    # The contents ETag is the blob SHA, so the raw response still yields
+    # the SHA needed for updates without the JSON envelope
+    current_sha = content_resp.headers.get("ETag", "").removeprefix("W/").strip('"')
+    if not current_sha:
+        # Rare: no ETag on the raw response; pay for the envelope after all
+        envelope_resp = await _cached_get(contents_path, token)
+        if envelope_resp.status_code != 200:
+            return parse_github_error(envelope_resp)
+        current_sha = orjson.loads(envelope_resp.content)["sha"]
+
+    commits = orjson.loads(history_resp.content) if history_resp.status_code == 200 else []
+
+    history_text = ""
+    latest_commit_sha = None
+
+    for c in commits:
+        if not latest_commit_sha: latest_commit_sha = c["sha"]
+        msg = c["commit"]["message"].split('\n')[0]
+        author = c["commit"]["author"]["name"]
+        history_text += f"- {author}: {msg}\n"
+
+    # C. Get Intent (PR) associated with the LATEST change
+    pr_context = "No associated PR found."
+    if latest_commit_sha:
+        # Special endpoint to link commit -> PR to understand business logic
+        pr_resp = await _cached_get(f"/repos/{owner}/{repo}/commits/{latest_commit_sha}/pulls", token)
+        if pr_resp.status_code == 200:
+            prs = orjson.loads(pr_resp.content)
+            if prs:
+                pr = prs[0]
                 pr_context = f"PR #{pr['number']} - {pr['title']}\n{pr['body'][:200]}..."
 
-        return (
-            f"DEEP INSPECTION: {path}\n"
-            f"File SHA: {current_sha} (Required for updates)\n"
-            f"===================================\n"
-            f"Recent History:\n{history_text}\n"
-            f"Business Intent (PR):\n{pr_context}\n"
-            f"===================================\n"
-            f"{content}"
-        )
+    report = (
+        f"DEEP INSPECTION: {path}\n"
+        f"File SHA: {current_sha} (Required for updates)\n"
+        f"===================================\n"
+        f"Recent History:\n{history_text}\n"
+        f"Business Intent (PR):\n{pr_context}"
+    )
+    if include_content:
+        report += f"\n===================================\n{content}"
+    return report
+
+# --- Helper: GraphQL blob batching ---
+# Paths per GraphQL query: large alias fan-outs risk GraphQL node limits
+# and make one slow query pace everything, so big lists are split into
+# batches that run concurrently.
+_GRAPHQL_BATCH_SIZE = 50
+
+async def _fetch_blobs_graphql(owner: str, repo: str, paths: list[str], token: str) -> dict:
+    """
+    Fetches N file blobs in one POST to /graphql using aliased object()
+    fields, collapsing N REST round-trips into a single request.
+
+    Returns the repository payload; aliases f0..fN map back to paths by
+    index. Raises on transport errors or a GraphQL-level error response.
+    """
+    # orjson.dumps produces a JSON string literal, which is also valid
+    # GraphQL string syntax — paths with quotes/backslashes stay escaped.
+    fields = "".join(
+        f"f{i}: object(expression: {orjson.dumps(f'HEAD:{p}').decode()})"
+        "{ ... on Blob { text } }"
+        for i, p in enumerate(paths)
+    )
+    query = "query($o:String!,$r:String!){ repository(owner:$o,name:$r){" + fields + "}}"
+
+    resp = await _gh_request(
+        "POST",
+        "/graphql",
+        content=orjson.dumps({"query": query, "variables": {"o": owner, "r": repo}}),
+        headers=_bearer_json_headers(token),
+    )
+    resp.raise_for_status()
+    payload = orjson.loads(resp.content)
+    if payload.get("errors"):
+        raise ValueError(payload["errors"][0].get("message", "GraphQL query failed"))
+    return payload["data"]["repository"]
 
 @mcp.tool()
 async def read_references(ctx: Context, owner: str, repo: str, paths: list[str]) -> str:
@@ -454,35 +1169,60 @@ async def read_references(ctx: Context, owner: str, repo: str, paths: list[str])
     API Calls: Multiple GET /contents calls in parallel.
 
     IMPORTANT: When the user asks to change a file of source code within
-    a project or github repository, get_repository_map represents the first 
-    tool in the cronilogical order of operations. You are required to call 
+    a project or github repository, get_repository_map represents the first
+    tool in the cronilogical order of operations. You are required to call
     all seven tools that have steps 1-7 to fully complete the task. See
     all tool docstrings for the step order. After completing these steps
     once, you can call tools as needed for adjustments to the file.
     """
     token = validate_header_token(ctx)
-    
-    # Inner helper to fetch individual file content safely
-    async def fetch_one(client, path):
-        resp = await client.get(
-            f"https://api.github.com/repos/{owner}/{repo}/contents/{path}",
-            headers={"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
+
+    # Inner helper to fetch individual file content safely.
+    # The raw media type makes GitHub send the file body directly: no JSON
+    # envelope to parse and no base64 inflation (+33% wire bytes) to decode.
+    async def fetch_one(path):
+        resp = await _cached_get(
+            _CONTENTS_URL.format(owner=owner, repo=repo, path=quote(path, safe="/")),
+            token,
+            headers=_RAW_ACCEPT,
         )
         if resp.status_code == 200:
             try:
-                content = base64.b64decode(resp.json()["content"]).decode("utf-8")
-                return f"--- REFERENCE: {path} ---\n{content}\n"
-            except:
+                return f"--- REFERENCE: {path} ---\n{resp.text}\n"
+            except UnicodeDecodeError:
                 return f"--- ERROR: Could not decode {path} ---\n"
-        
+
         # Return strict error if failed, so LLM knows why import is missing
         return f"--- ERROR: {path} ({parse_github_error(resp)}) ---\n"
 
-    async with httpx.AsyncClient() as client:
-        # Create tasks for every path requested
-        tasks = [fetch_one(client, p) for p in paths]
-        results = await asyncio.gather(*tasks)
-    
+    # Fast path: GraphQL returns whole batches of blobs at once — one
+    # round-trip and one JSON parse per 50 paths instead of per path, with
+    # no base64 anywhere. Batches beyond the first run concurrently.
+    if paths:
+        try:
+            batches = [
+                paths[i:i + _GRAPHQL_BATCH_SIZE]
+                for i in range(0, len(paths), _GRAPHQL_BATCH_SIZE)
+            ]
+            repo_datas = await asyncio.gather(
+                *(_fetch_blobs_graphql(owner, repo, batch, token) for batch in batches)
+            )
+            results = []
+            for batch, repo_data in zip(batches, repo_datas):
+                for i, path in enumerate(batch):
+                    blob = repo_data.get(f"f{i}")
+                    if blob and blob.get("text") is not None:
+                        results.append(f"--- REFERENCE: {path} ---\n{blob['text']}\n")
+                    else:
+                        results.append(f"--- ERROR: {path} (not found or binary) ---\n")
+            return "\n".join(results)
+        except Exception:
+            pass  # GraphQL unavailable (e.g., fine-grained token); use REST
+
+    # Fallback: concurrent REST fetches, one per path
+    tasks = [fetch_one(p) for p in paths]
+    results = await asyncio.gather(*tasks)
+
     return "\n".join(results)
 
 # ==============================================================================
@@ -490,6 +1230,65 @@ async def read_references(ctx: Context, owner: str, repo: str, paths: list[str])
 # Use these tools to safely write changes and submit them.
 # ==============================================================================
 
+# --- Helper: Rate-Limit Preflight ---
+async def _check_budget(token: str, need: int = 5) -> str | None:
+    """
+    Checks the core rate limit before a multi-call write workflow; the
+    /rate_limit endpoint itself costs nothing, so failing here is pure
+    savings over failing midway with half the work done.
+
+    Returns None when at least `need` calls remain, else an abort message
+    including the reset time.
+    """
+    resp = await _gh_request("GET", "/rate_limit", headers=_bearer_headers(token))
+    if resp.status_code != 200:
+        return None  # Can't tell; proceed and let real calls surface errors
+
+    core = orjson.loads(resp.content)["resources"]["core"]
+    if core["remaining"] >= need:
+        return None
+
+    reset_in = max(0, int(core["reset"]) - int(time.time()))
+    return (
+        f"Rate limit nearly exhausted ({core['remaining']} calls left, "
+        f"{need} needed). Resets in {reset_in}s. No changes were made."
+    )
+
+# --- Helper: Base-Branch SHA Cache ---
+# Base branches are only *read* here (new work branches off them), so a
+# short TTL avoids re-fetching the ref on every workspace setup. Keyed by
+# token digest like the ETag cache so tenants never share entries. Never
+# use this for branches the server itself advances (commit_files_batch
+# needs the live head).
+_BASE_SHA_CACHE: dict[tuple, tuple[float, str]] = {}
+_BASE_SHA_TTL = 60.0
+
+async def _get_base_sha(
+    owner: str, repo: str, branch: str, token: str
+) -> "tuple[str | None, httpx.Response | None]":
+    """
+    Resolves a base branch to its commit SHA with a 60s in-process cache.
+
+    Returns (sha, None) on success or (None, response) so the caller can
+    run the failed response through parse_github_error.
+    """
+    key = (_token_cache_key(token), owner, repo, branch)
+    entry = _BASE_SHA_CACHE.get(key)
+    if entry is not None and time.monotonic() < entry[0]:
+        return entry[1], None
+
+    resp = await _gh_request(
+        "GET",
+        f"/repos/{owner}/{repo}/git/ref/heads/{quote(branch, safe='')}",
+        headers=_bearer_headers(token),
+    )
+    if resp.status_code != 200:
+        return None, resp
+
+    sha = orjson.loads(resp.content)["object"]["sha"]
+    _BASE_SHA_CACHE[key] = (time.monotonic() + _BASE_SHA_TTL, sha)
+    return sha, None
+
 @mcp.tool()
 async def initialize_workspace(ctx: Context, owner: str, repo: str, base_branch: str = "main") -> str:
     """
@@ -497,83 +1296,260 @@ async def initialize_workspace(ctx: Context, owner: str, repo: str, base_branch:
     API Calls: GET /git/ref/heads/{base}, POST /git/refs
 
     IMPORTANT: When the user asks to change a file of source code within
-    a project or github repository, get_repository_map represents the first 
-    tool in the cronilogical order of operations. You are required to call 
+    a project or github repository, get_repository_map represents the first
+    tool in the cronilogical order of operations. You are required to call
     all seven tools that have steps 1-7 to fully complete the task. See
     all tool docstrings for the step order. After completing these steps
     once, you can call tools as needed for adjustments to the file.
     """
     token = validate_header_token(ctx)
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
-    
-    # Generate a unique branch name (timestamp based ideally, or fixed for simplicity)
-    import time
-    new_branch = f"docs/update-{int(time.time())}"
-    
-    async with httpx.AsyncClient() as client:
-        # 1. Get SHA of base branch to know where to start from
-        ref_resp = await client.get(f"https://api.github.com/repos/{owner}/{repo}/git/ref/heads/{base_branch}", headers=headers)
-        
-        # Explicit error checking (e.g., if 'main' doesn't exist or access denied)
-        if ref_resp.status_code != 200:
-            return f"Failed to find base branch '{base_branch}': {parse_github_error(ref_resp)}"
-        
-        base_sha = ref_resp.json()["object"]["sha"]
-        
-        # 2. Create new branch pointing to that SHA
-        create_resp = await client.post(
-            f"https://api.github.com/repos/{owner}/{repo}/git/refs",
-            json={"ref": f"refs/heads/{new_branch}", "sha": base_sha},
-            headers=headers
-        )
-        
-        if create_resp.status_code == 201:
-            return f"Workspace initialized. Created branch: '{new_branch}'"
-        
-        # If branch creation fails (e.g., already exists or protected), explain why
-        return f"Error creating branch: {parse_github_error(create_resp)}"
+
+    # Abort before any mutation if the quota can't cover the setup
+    # sequence (ref lookup + repo metadata + branch POST)
+    budget_error = await _check_budget(token, need=3)
+    if budget_error is not None:
+        return budget_error
+
+    # Generate a unique branch name. The random suffix means two calls in
+    # the same second can't collide and burn a 422 + retry round-trip.
+    new_branch = f"docs/update-{int(time.time())}-{secrets.token_hex(3)}"
+
+    # 1. Get SHA of base branch to know where to start from (60s cache;
+    # repeated workspace setups skip the ref round-trip). The repo
+    # metadata fetch is independent, so it rides along in the same gather
+    # as a push-access preflight instead of costing its own round-trip.
+    (base_sha, ref_err), repo_resp = await asyncio.gather(
+        _get_base_sha(owner, repo, base_branch, token),
+        _cached_get(f"/repos/{owner}/{repo}", token),
+    )
+
+    # Explicit error checking (e.g., if 'main' doesn't exist or access denied)
+    if base_sha is None:
+        return f"Failed to find base branch '{base_branch}': {parse_github_error(ref_err)}"
+
+    # Fail fast with a clear message before attempting the write
+    if repo_resp.status_code == 200:
+        perms = orjson.loads(repo_resp.content).get("permissions", {})
+        if not perms.get("push"):
+            return f"Error: your token has no push access to {owner}/{repo}."
+
+    # 2. Create new branch pointing to that SHA
+    create_resp = await _gh_request(
+        "POST",
+        f"/repos/{owner}/{repo}/git/refs",
+        content=orjson.dumps({"ref": f"refs/heads/{new_branch}", "sha": base_sha}),
+        headers=_bearer_json_headers(token)
+    )
+
+    if create_resp.status_code == 201:
+        return f"Workspace initialized. Created branch: '{new_branch}'"
+
+    # If branch creation fails (e.g., already exists or protected), explain why
+    return f"Error creating branch: {parse_github_error(create_resp)}"
+
+class CommitResult(TypedDict):
+    """
+    Machine-readable outcome of commit_file_update. Downstream steps can
+    read commit_sha/branch directly instead of re-querying the branch
+    head to rediscover what this call just did.
+    """
+    ok: bool
+    path: str
+    branch: str
+    commit_sha: str | None
+    message: str
+
+def _git_blob_sha(data: bytes) -> str:
+    """
+    Computes git's blob object ID ('blob {len}\\0' + data, SHA-1) locally,
+    letting no-op updates be detected without a network round-trip.
+    """
+    h = hashlib.sha1()
+    h.update(f"blob {len(data)}\0".encode())
+    h.update(data)
+    return h.hexdigest()
 
 @mcp.tool()
-async def commit_file_update(ctx: Context, owner: str, repo: str, branch: str, path: str, new_content: str, original_sha: str, message: str) -> str:
+async def commit_file_update(ctx: Context, owner: str, repo: str, branch: str, path: str, new_content: str, original_sha: str, message: str) -> CommitResult:
     """
-    Step 6: Writes the documented code to the file. 
+    Step 6: Writes the documented code to the file.
     API Call: PUT /contents/{path}
 
     IMPORTANT TOOL INFORMATION: Present the any code changes to the user
-    before calling this tool. Additionally, You  are only permitted to 
-    commit files to the new branch you made from the previous tool called 
+    before calling this tool. Additionally, You  are only permitted to
+    commit files to the new branch you made from the previous tool called
     initialize_workspace.
-    
+
     IMPORTANT: When the user asks to change a file of source code within
-    a project or github repository, get_repository_map represents the first 
-    tool in the cronilogical order of operations. You are required to call 
+    a project or github repository, get_repository_map represents the first
+    tool in the cronilogical order of operations. You are required to call
     all seven tools that have steps 1-7 to fully complete the task. See
     all tool docstrings for the step order. After completing these steps
     once, you can call tools as needed for adjustments to the file.
     """
     token = validate_header_token(ctx)
-    # GitHub API requires content to be Base64 encoded
-    encoded = base64.b64encode(new_content.encode("utf-8")).decode("utf-8")
-    
+    data = new_content.encode("utf-8")
+
+    # Identical content hashes to the blob SHA the file already has; skip
+    # the PUT (and the empty commit it would create) entirely
+    if _git_blob_sha(data) == original_sha:
+        return CommitResult(
+            ok=True, path=path, branch=branch, commit_sha=None,
+            message=f"File '{path}' already matches this content. Nothing committed.",
+        )
+
+    # GitHub API requires content to be Base64 encoded. b2a_base64 is the
+    # C primitive b64encode wraps; calling it directly (newline=False)
+    # skips a layer of Python on what can be a large file body.
+    encoded = binascii.b2a_base64(data, newline=False).decode("ascii")
+
     payload = {
         "message": message,
         "content": encoded,
         "branch": branch,
         "sha": original_sha  # Critical for concurrency safety (rejects if file changed elsewhere)
     }
-    
-    async with httpx.AsyncClient() as client:
-        resp = await client.put(
-            f"https://api.github.com/repos/{owner}/{repo}/contents/{path}",
-            json=payload,
-            headers={"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
+
+    resp = await _gh_request(
+        "PUT",
+        _CONTENTS_URL.format(owner=owner, repo=repo, path=quote(path, safe="/")),
+        content=orjson.dumps(payload),  # C serializer; body carries the whole file
+        headers=_bearer_json_headers(token)
+    )
+
+    if resp.is_success:  # 200 on update, 201 on create; no list allocation
+        return CommitResult(
+            ok=True, path=path, branch=branch,
+            commit_sha=orjson.loads(resp.content)["commit"]["sha"],
+            message=f"File '{path}' successfully updated on branch '{branch}'.",
+        )
+
+    # Capture conflicts (409) or permission errors (403)
+    return CommitResult(
+        ok=False, path=path, branch=branch, commit_sha=None,
+        message=f"Update failed: {parse_github_error(resp)}",
+    )
+
+@mcp.tool()
+async def commit_files_batch(
+    ctx: Context, owner: str, repo: str, branch: str, files: dict[str, str], message: str
+) -> str:
+    """
+    Step 6 (alternative): Writes SEVERAL files as one atomic commit.
+    API Calls: POST /git/blobs (parallel), POST /git/trees,
+    POST /git/commits, PATCH /git/refs
+
+    IMPORTANT: Prefer this over repeated 'commit_file_update' calls when
+    changing more than one file — all blobs upload concurrently and land
+    in a single commit instead of N sequential commits. 'files' maps each
+    repository path to its full new content.
+    """
+    token = validate_header_token(ctx)
+    headers = _bearer_headers(token)
+
+    if not files:
+        return "Error: no files supplied."
+
+    # 1. Resolve the branch head and its tree (the commit parent/base)
+    ref_resp = await _gh_request(
+        "GET", f"/repos/{owner}/{repo}/git/ref/heads/{quote(branch, safe='')}", headers=headers
+    )
+    if ref_resp.status_code != 200:
+        return f"Failed to find branch '{branch}': {parse_github_error(ref_resp)}"
+    parent_sha = orjson.loads(ref_resp.content)["object"]["sha"]
+
+    commit_resp = await _gh_request(
+        "GET", f"/repos/{owner}/{repo}/git/commits/{parent_sha}", headers=headers
+    )
+    if commit_resp.status_code != 200:
+        return f"Failed to read branch head: {parse_github_error(commit_resp)}"
+    base_tree = orjson.loads(commit_resp.content)["tree"]["sha"]
+
+    new_sha, error = await _commit_tree(
+        owner, repo, branch, files, message, token, parent_sha, base_tree
+    )
+    if error is not None:
+        return error
+
+    return f"Committed {len(files)} files to '{branch}' in one commit ({new_sha[:7]})."
+
+async def _commit_tree(
+    owner: str,
+    repo: str,
+    branch: str,
+    files: dict[str, str],
+    message: str,
+    token: str,
+    parent_sha: str,
+    base_tree: str,
+) -> "tuple[str | None, str | None]":
+    """
+    Uploads all blobs concurrently, builds one tree + commit on top of
+    parent_sha, and fast-forwards the branch ref to it.
+
+    Returns (commit_sha, None) on success or (None, error_message).
+    """
+    json_headers = _bearer_json_headers(token)
+
+    # 1. Upload every blob concurrently; the Git Data API takes UTF-8
+    # directly, so no base64 inflation on any of them
+    paths = list(files)
+    blob_resps = await asyncio.gather(*(
+        _gh_request(
+            "POST",
+            f"/repos/{owner}/{repo}/git/blobs",
+            content=orjson.dumps({"content": files[p], "encoding": "utf-8"}),
+            headers=json_headers,
         )
-        
-        if resp.status_code in [200, 201]:
-            return f"File '{path}' successfully updated on branch '{branch}'."
-        
-        # Capture conflicts (409) or permission errors (403)
-        return f"Update failed: {parse_github_error(resp)}"
+        for p in paths
+    ))
+    blob_shas = []
+    for p, resp in zip(paths, blob_resps):
+        if resp.status_code != 201:
+            return None, f"Failed to upload '{p}': {parse_github_error(resp)}"
+        blob_shas.append(orjson.loads(resp.content)["sha"])
+
+    # 2. One tree referencing all new blobs on top of the current tree
+    tree_resp = await _gh_request(
+        "POST",
+        f"/repos/{owner}/{repo}/git/trees",
+        content=orjson.dumps({
+            "base_tree": base_tree,
+            "tree": [
+                {"path": p, "mode": "100644", "type": "blob", "sha": sha}
+                for p, sha in zip(paths, blob_shas)
+            ],
+        }),
+        headers=json_headers,
+    )
+    if tree_resp.status_code != 201:
+        return None, f"Failed to build tree: {parse_github_error(tree_resp)}"
+
+    # 3. Commit the tree and fast-forward the branch to it
+    new_commit_resp = await _gh_request(
+        "POST",
+        f"/repos/{owner}/{repo}/git/commits",
+        content=orjson.dumps({
+            "message": message,
+            "tree": orjson.loads(tree_resp.content)["sha"],
+            "parents": [parent_sha],
+        }),
+        headers=json_headers,
+    )
+    if new_commit_resp.status_code != 201:
+        return None, f"Failed to create commit: {parse_github_error(new_commit_resp)}"
+    new_sha = orjson.loads(new_commit_resp.content)["sha"]
+
+    patch_resp = await _gh_request(
+        "PATCH",
+        f"/repos/{owner}/{repo}/git/refs/heads/{quote(branch, safe='')}",
+        content=orjson.dumps({"sha": new_sha}),
+        headers=json_headers,
+    )
+    if patch_resp.status_code != 200:
+        return None, f"Failed to update branch: {parse_github_error(patch_resp)}"
+
+    return new_sha, None
 
 @mcp.tool()
 async def submit_review_request(ctx: Context, owner: str, repo: str, head_branch: str, title: str, body: str, base_branch: str = "main") -> str:
@@ -586,28 +1562,122 @@ async def submit_review_request(ctx: Context, owner: str, repo: str, head_branch
     call in completing the core request from the user.
 
     IMPORTANT: When the user asks to change a file of source code within
-    a project or github repository, get_repository_map represents the first 
-    tool in the cronilogical order of operations. You are required to call 
+    a project or github repository, get_repository_map represents the first
+    tool in the cronilogical order of operations. You are required to call
     all seven tools that have steps 1-7 to fully complete the task. See
     all tool docstrings for the step order. After completing these steps
     once, you can call tools as needed for adjustments to the file.
     """
     token = validate_header_token(ctx)
     payload = {"title": title, "body": body, "head": head_branch, "base": base_branch}
-    
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"https://api.github.com/repos/{owner}/{repo}/pulls",
-            json=payload,
-            headers={"Authorization": f"Bearer {token}", "Accept": "application/vnd.github.v3+json"}
-        )
-        
-        if resp.status_code == 201:
-            return f"Success! PR Created: {resp.json()['html_url']}"
-        
-        # Capture if PR already exists (422) or access denied
-        return f"PR Creation failed: {parse_github_error(resp)}"
+
+    resp = await _gh_request(
+        "POST",
+        f"/repos/{owner}/{repo}/pulls",
+        content=orjson.dumps(payload),
+        headers=_bearer_json_headers(token)
+    )
+
+    if resp.status_code == 201:
+        return f"Success! PR Created: {orjson.loads(resp.content)['html_url']}"
+
+    # Capture if PR already exists (422) or access denied
+    return f"PR Creation failed: {parse_github_error(resp)}"
+
+@mcp.tool()
+async def publish_docs(
+    ctx: Context,
+    owner: str,
+    repo: str,
+    files: dict[str, str],
+    pr_title: str,
+    pr_body: str,
+    commit_message: str = "Update documentation",
+    base_branch: str = "main",
+) -> str:
+    """
+    Steps 5+6+7 fused: creates a branch, commits all files atomically,
+    and opens the Pull Request — in a single call.
+    API Calls: GET ref (cached), POST /git/refs, the Git Data commit
+    sequence, POST /pulls
+
+    IMPORTANT: Prefer this over the separate initialize_workspace /
+    commit_file_update / submit_review_request sequence once the user has
+    approved the final content: one token validation, one connection, and
+    no LLM round-trips between the steps. 'files' maps repository paths
+    to their full new content.
+    """
+    token = validate_header_token(ctx)
+    headers = _bearer_headers(token)
+
+    if not files:
+        return "Error: no files supplied."
+
+    # 0. Abort before any mutation if the quota can't cover the workflow
+    budget_error = await _check_budget(token, need=5 + len(files))
+    if budget_error is not None:
+        return budget_error
+
+    # 1. Resolve the base branch (cached) and its tree
+    base_sha, ref_err = await _get_base_sha(owner, repo, base_branch, token)
+    if base_sha is None:
+        return f"Failed to find base branch '{base_branch}': {parse_github_error(ref_err)}"
+
+    commit_resp = await _gh_request(
+        "GET", f"/repos/{owner}/{repo}/git/commits/{base_sha}", headers=headers
+    )
+    if commit_resp.status_code != 200:
+        return f"Failed to read base commit: {parse_github_error(commit_resp)}"
+    base_tree = orjson.loads(commit_resp.content)["tree"]["sha"]
+
+    # 2. Branch off the base SHA
+    new_branch = f"docs/update-{int(time.time())}-{secrets.token_hex(3)}"
+    create_resp = await _gh_request(
+        "POST",
+        f"/repos/{owner}/{repo}/git/refs",
+        content=orjson.dumps({"ref": f"refs/heads/{new_branch}", "sha": base_sha}),
+        headers=_bearer_json_headers(token),
+    )
+    if create_resp.status_code != 201:
+        return f"Error creating branch: {parse_github_error(create_resp)}"
+
+    # 3. One atomic commit with every file
+    commit_sha, error = await _commit_tree(
+        owner, repo, new_branch, files, commit_message, token, base_sha, base_tree
+    )
+    if error is not None:
+        return error
+
+    # 4. Open the PR
+    pr_resp = await _gh_request(
+        "POST",
+        f"/repos/{owner}/{repo}/pulls",
+        content=orjson.dumps({
+            "title": pr_title,
+            "body": pr_body,
+            "head": new_branch,
+            "base": base_branch,
+        }),
+        headers=_bearer_json_headers(token),
+    )
+    if pr_resp.status_code != 201:
+        return f"PR Creation failed: {parse_github_error(pr_resp)}"
+
+    return (
+        f"Success! Published {len(files)} files.\n"
+        f"Branch: {new_branch}\n"
+        f"Commit: {commit_sha}\n"
+        f"PR: {orjson.loads(pr_resp.content)['html_url']}"
+    )
 
 # --- Start the MCP server ---
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    # uvloop's libuv-backed event loop is a drop-in ~2-4x throughput win for
+    # this I/O-bound workload; unavailable on Windows, optional elsewhere.
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass  # Stdlib loop still works, just slower
+    mcp.run()